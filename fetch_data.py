@@ -5,8 +5,12 @@ Fetches movies and TV shows from the last 365 days
 """
 
 import os
-import json
-import requests
+import gzip
+import zlib
+import asyncio
+import aiohttp
+import orjson
+from tqdm import tqdm
 import time
 import sys
 from datetime import datetime, timedelta
@@ -22,11 +26,21 @@ MIN_RATING = 7.0         # Minimum TMDB rating (0-10)
 START_YEAR = 1990        # Year to start fetching from (e.g., 2024)
 START_MONTH = 1          # Month to start fetching from (1-12, e.g., 2 = February)
 
+SKIP_GENRES = frozenset({'Animation', 'Music', 'Documentary', 'Kids', 'Reality'})  # Titles with any of these are dropped
+
 MAX_PAGES_PER_TYPE = 500 # Max pages to fetch per content type (movies/TV) - 500 pages = ~10,000 items
 
 # Rate limiting
 REQUESTS_PER_10_SEC = 40
-DELAY_BETWEEN_REQUESTS = 10.0 / REQUESTS_PER_10_SEC  # 0.25 seconds
+MAX_CONCURRENT_REQUESTS = 40  # Max requests in flight at once
+MAX_RETRIES = 5               # Retries on 429/5xx, connection errors and timeouts before giving up
+
+# Connection pooling
+KEEPALIVE_SECONDS = 60   # Keep idle connections to TMDB open for reuse
+REQUEST_TIMEOUT = 30     # Seconds before an attempt times out; timed-out requests are retried (MAX_RETRIES)
+
+# Response cache (ETag-based, reused between runs). Kept outside the repo so GitHub Pages never publishes it
+CACHE_FILE = os.path.expanduser('~/.cache/tmdb/tmdb_cache.json.gz')
 
 # ============= SETUP =============
 TMDB_TOKEN = os.environ.get('TMDB_TOKEN')
@@ -34,6 +48,7 @@ if not TMDB_TOKEN:
     raise ValueError("TMDB_TOKEN environment variable not set!")
 
 API_BASE = 'https://api.themoviedb.org/3'
+IMG_PREFIX = 'https://image.tmdb.org/t/p/original'
 HEADERS = {
     'Authorization': f'Bearer {TMDB_TOKEN}',
     'Content-Type': 'application/json'
@@ -49,158 +64,338 @@ print(f"📅 Date range: {START_DATE_STR} to {end_date.strftime('%Y-%m-%d')}")
 print(f"⭐ Min rating: {MIN_RATING}, Min votes: {MIN_VOTES}")
 print(f"📆 Fetching from: {START_YEAR}-{START_MONTH:02d} to present\n")
 
-# ============= RATE-LIMITED REQUEST =============
-last_request_time = 0
+# ============= RESPONSE CACHE =============
+def load_cache():
+    """Load {url: {'etag': ..., 'data': ...}} saved by the previous run"""
+    if not os.path.exists(CACHE_FILE):
+        return {}
+    try:
+        with gzip.open(CACHE_FILE, 'rb') as f:
+            cache = orjson.loads(f.read())
+    except (OSError, EOFError, zlib.error, orjson.JSONDecodeError):
+        cache = None
+    if not isinstance(cache, dict):
+        print(f"⚠️  Ignoring unreadable cache file {CACHE_FILE}")
+        return {}
+    return cache
+
+def save_cache(cache):
+    """Write the cache via a temp file, so an interrupted write never leaves a corrupt cache"""
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp_file = CACHE_FILE + '.tmp'
+    with gzip.open(tmp_file, 'wb') as f:
+        f.write(orjson.dumps(cache))
+    os.replace(tmp_file, CACHE_FILE)
+
+previous_cache = load_cache()
+current_cache = {}  # Only entries seen this run are saved, so stale items drop out
+cache_hits = 0
 
-def rate_limited_get(url):
-    global last_request_time
+# ============= RATE-LIMITED REQUEST =============
+class TokenBucket:
+    """Allows bursts of up to `capacity` requests, refilled at `rate` tokens per second
+    
+    Starts empty, so no window of 1/rate seconds sees more than `capacity` requests.
+    """
     
-    # Enforce rate limit
-    elapsed = time.time() - last_request_time
-    if elapsed < DELAY_BETWEEN_REQUESTS:
-        time.sleep(DELAY_BETWEEN_REQUESTS - elapsed)
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = 0
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
     
-    last_request_time = time.time()
-    response = requests.get(url, headers=HEADERS)
-    response.raise_for_status()
-    return response.json()
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+    
+    def pause(self, seconds):
+        """Hold back every caller for `seconds`, e.g. after a 429 for the whole client"""
+        self.tokens = min(self.tokens, 0)
+        self.updated = max(self.updated, time.monotonic() + seconds)
+
+# Capacity 1 spaces requests evenly, so any 10s window stays within REQUESTS_PER_10_SEC
+rate_limiter = TokenBucket(1, REQUESTS_PER_10_SEC / 10.0)
+in_flight = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+def retry_delay(response, attempt):
+    """Seconds to wait before retrying, honouring Retry-After on 429"""
+    if response.status == 429:
+        try:
+            return float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            pass
+    return 2 ** attempt
+
+async def rate_limited_get(session, url, trim=None):
+    """GET url as JSON; `trim`, if given, shrinks the payload before it is cached and returned"""
+    global cache_hits
+    
+    # Pop so each cached payload is held once, either here or in current_cache
+    cached = previous_cache.pop(url, None)
+    headers = {'If-None-Match': cached['etag']} if cached else None
+    
+    for attempt in range(MAX_RETRIES + 1):
+        await rate_limiter.acquire()
+        try:
+            async with in_flight:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        if trim:
+                            cached['data'] = trim(cached['data'])
+                        current_cache[url] = cached
+                        cache_hits += 1
+                        return cached['data']
+                    
+                    # Retry rate limiting and transient server errors with backoff
+                    retryable = response.status == 429 or 500 <= response.status < 600
+                    if not retryable or attempt == MAX_RETRIES:
+                        response.raise_for_status()
+                        data = orjson.loads(await response.read())
+                        break
+            
+            delay = retry_delay(response, attempt)
+            reason = f"HTTP {response.status}"
+            throttled = response.status == 429
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+            # Dropped/stale connections and timeouts are retried the same way
+            if attempt == MAX_RETRIES:
+                raise
+            delay = 2 ** attempt
+            reason = type(e).__name__
+            throttled = False
+        
+        tqdm.write(f"⚠️  {reason} for {url}, retrying in {delay:.0f}s ({attempt + 1}/{MAX_RETRIES})")
+        if throttled:
+            # A 429 means the whole client is over quota, so back off every request, not just this one
+            rate_limiter.pause(delay)
+        else:
+            await asyncio.sleep(delay)
+    
+    if trim:
+        data = trim(data)
+    etag = response.headers.get('ETag')
+    if etag:
+        current_cache[url] = {'etag': etag, 'data': data}
+    return data
 
 # ============= FETCH ALL PAGES =============
-def fetch_all_pages(url, max_pages=MAX_PAGES_PER_TYPE):
-    all_results = []
-    page = 1
-    total_pages = 1
+def progress_bar(total, label):
+    # Redraw often in a terminal, but keep GitHub Actions logs to a line every 10s
+    return tqdm(total=total, desc=f"  {label}", mininterval=0.1 if sys.stderr.isatty() else 10)
+
+async def fetch_all_pages(session, url, max_pages=MAX_PAGES_PER_TYPE):
+    """Fetch page 1 for total_pages, then the remaining pages concurrently"""
+    print("  Fetching page 1...")
+    first = await rate_limited_get(session, f"{url}&page=1")
+    if 'results' not in first:
+        return []
     
-    while page <= min(total_pages, max_pages):
-        page_url = f"{url}&page={page}"
-        print(f"  Fetching page {page}/{min(total_pages, max_pages)}...")
-        
-        data = rate_limited_get(page_url)
-        
-        if 'results' in data:
-            all_results.extend(data['results'])
-            total_pages = data.get('total_pages', 1)
-        
-        page += 1
+    last_page = min(first.get('total_pages', 1), max_pages)
+    progress = progress_bar(last_page, "Pages")
+    progress.update(1)
+    
+    async def fetch_page(page):
+        data = await rate_limited_get(session, f"{url}&page={page}")
+        progress.update(1)
+        return data
+    
+    try:
+        rest = await asyncio.gather(*[fetch_page(page) for page in range(2, last_page + 1)])
+    finally:
+        progress.close()
+    
+    all_results = []
+    for data in [first, *rest]:
+        all_results.extend(data.get('results', []))
     
     return all_results
 
-# ============= FETCH DETAILS WITH OPTIMIZATION =============
-def fetch_item_details(item_id, media_type):
-    """Fetch credits and providers in ONE API call using append_to_response"""
-    url = f"{API_BASE}/{media_type}/{item_id}?append_to_response=credits,watch/providers"
-    return rate_limited_get(url)
-
-# ============= PROCESS MOVIES =============
-print("📽️  FETCHING MOVIES...")
-movies_url = (
-    f"{API_BASE}/discover/movie"
-    f"?sort_by=popularity.desc"
-    f"&primary_release_date.gte={START_DATE_STR}"
-    f"&vote_count.gte={MIN_VOTES}"
-    f"&vote_average.gte={MIN_RATING}"
-)
-
-movies = fetch_all_pages(movies_url)
-print(f"✅ Found {len(movies)} movies\n")
-
-print("📥 Fetching movie details (credits + providers)...")
-movies_data = []
+# ============= EXTRACT CREDITS =============
+def extract_credits(credits, include_director=True):
+    """Return (director, top 3 actors) from a credits block, 'N/A' when missing"""
+    director = 'N/A'
+    if include_director:
+        for person in credits.get('crew') or ():
+            if person.get('job') == 'Director':
+                director = person['name']
+                break
+    
+    top_actors = [actor['name'] for actor in (credits.get('cast') or ())[:3]]
+    actors = ', '.join(top_actors) if top_actors else 'N/A'
+    return director, actors
+
+# ============= PROCESS ITEMS =============
+def extract_episode(episode):
+    if not episode:
+        return None
+    return {
+        'season': episode.get('season_number'),
+        'episode': episode.get('episode_number'),
+        'air_date': episode.get('air_date'),
+        'name': episode.get('name')
+    }
 
-for i, movie in enumerate(movies):
-    if i % 10 == 0:
-        progress_pct = int((i / len(movies)) * 100) if len(movies) > 0 else 0
-        print(f"  Movies: {i}/{len(movies)} ({progress_pct}%)", flush=True)
+def process_item(details, raw, media_type):
+    """Build the output entry for one movie or TV show, or None if it should be skipped"""
+    # Extract genres, skipping blocked ones before doing any other work
+    genre_list = [g['name'] for g in details.get('genres') or ()]
+    if SKIP_GENRES.intersection(genre_list):
+        return None
+    # Genre combinations and provider names repeat across thousands of titles, so intern them
+    genres = sys.intern(', '.join(genre_list)) if genre_list else 'N/A'
     
-    details = fetch_item_details(movie['id'], 'movie')
+    # Skip Mexican titles
+    if 'MX' in details.get('origin_country', []):
+        return None
+    if any(pc.get('iso_3166_1') == 'MX' for pc in details.get('production_countries', [])):
+        return None
     
-    # Extract director
-    director = 'N/A'
-    if details.get('credits') and details['credits'].get('crew'):
-        director_person = next((p for p in details['credits']['crew'] if p.get('job') == 'Director'), None)
-        if director_person:
-            director = director_person['name']
+    # Extract streaming providers (US), skipping Passionflix Amazon channel titles
+    providers = details.get('watch/providers', {}).get('results', {}).get('US', {})
+    flatrate = providers.get('flatrate') or ()
+    if any(p.get('provider_name') == 'Passionflix Amazon Channel' for p in flatrate):
+        return None
+    streaming = [
+        {'name': sys.intern(p['provider_name']), 'logo': sys.intern(IMG_PREFIX + p['logo_path'])}
+        for p in flatrate
+    ]
     
-    # Extract top 3 actors
-    actors = 'N/A'
-    if details.get('credits') and details['credits'].get('cast'):
-        top_actors = [actor['name'] for actor in details['credits']['cast'][:3]]
-        if top_actors:
-            actors = ', '.join(top_actors)
+    # Extract director (movies only) and top 3 actors
+    is_movie = media_type == 'movie'
+    director, actors = extract_credits(details.get('credits') or {}, include_director=is_movie)
     
-    # Extract streaming providers (US)
-    streaming = []
-    providers = details.get('watch/providers', {}).get('results', {}).get('US', {})
-    if providers.get('flatrate'):
-        streaming = [
-            {
-                'name': p['provider_name'],
-                'logo': f"https://image.tmdb.org/t/p/original{p['logo_path']}"
-            }
-            for p in providers['flatrate']
-        ]
+    date_key = 'release_date' if is_movie else 'first_air_date'
+    date = raw.get(date_key)
+    item = {
+        'id': raw['id'],
+        'title': raw['title'] if is_movie else raw['name'],
+        'overview': raw.get('overview', ''),
+        'poster_path': raw.get('poster_path'),
+        date_key: date,
+        'year': int(date[:4]) if date else None,
+        'vote_average': raw['vote_average'],
+        'vote_count': raw['vote_count']
+    }
     
-    # Extract genres
-    genres = 'N/A'
-    genre_list = []
-    if details.get('genres'):
-        genre_list = [g['name'] for g in details['genres']]
-        if genre_list:
-            genres = ', '.join(genre_list)
+    if is_movie:
+        item['director'] = director
+    item['actors'] = actors
+    item['genres'] = genres
     
-    # Skip if Animation, Music, Documentary, Kids, or Reality genre
-    if any(g in ['Animation', 'Music', 'Documentary', 'Kids', 'Reality'] for g in genre_list):
-        continue
+    # Extract TV show status and episodes
+    if not is_movie:
+        item['tv_status'] = {
+            'status': details.get('status', 'N/A'),
+            'in_production': details.get('in_production', False),
+            'last_episode': extract_episode(details.get('last_episode_to_air')),
+            'next_episode': extract_episode(details.get('next_episode_to_air'))
+        }
     
-    # Skip Mexican titles
-    origin_countries = details.get('origin_country', [])
-    production_countries = details.get('production_countries', [])
+    item['providers'] = {'streaming': streaming}
+    item['type'] = media_type
+    return item
+
+def dedupe_by_id(items):
+    """Deduplicate by ID (keep first occurrence)"""
+    seen_ids = set()
+    unique = []
+    for item in items:
+        if item['id'] not in seen_ids:
+            seen_ids.add(item['id'])
+            unique.append(item)
+    return unique
+
+# ============= GENRE PRE-FILTER =============
+async def fetch_blocked_genre_ids(session, media_type):
+    """IDs of SKIP_GENRES, so blocked titles can be dropped before fetching their details"""
+    data = await rate_limited_get(session, f"{API_BASE}/genre/{media_type}/list")
+    return {g['id'] for g in data.get('genres', []) if g['name'] in SKIP_GENRES}
+
+def drop_blocked_genres(items, blocked_ids):
+    return [item for item in items if not blocked_ids.intersection(item.get('genre_ids') or ())]
+
+# ============= FETCH DETAILS WITH OPTIMIZATION =============
+def trim_details(details):
+    """Keep only the fields process_item reads, so cached details stay small
     
-    # Check if Mexico is in origin_country list
-    if 'MX' in origin_countries:
-        continue
+    Full responses carry every crew and cast member and providers for every country.
+    Trimming an already trimmed payload returns the same fields.
+    """
+    credits = details.get('credits') or {}
+    director = next((p for p in credits.get('crew') or () if p.get('job') == 'Director'), None)
+    us_providers = details.get('watch/providers', {}).get('results', {}).get('US', {})
     
-    # Check if Mexico is in production_countries
-    if any(pc.get('iso_3166_1') == 'MX' for pc in production_countries):
-        continue
+    trimmed = {
+        'genres': [{'name': g['name']} for g in details.get('genres') or ()],
+        'origin_country': details.get('origin_country', []),
+        'production_countries': [
+            {'iso_3166_1': pc.get('iso_3166_1')} for pc in details.get('production_countries', [])
+        ],
+        'watch/providers': {'results': {'US': {'flatrate': [
+            {'provider_name': p.get('provider_name'), 'logo_path': p.get('logo_path')}
+            for p in us_providers.get('flatrate') or ()
+        ]}}},
+        'credits': {
+            'crew': [{'job': 'Director', 'name': director['name']}] if director else [],
+            'cast': [{'name': actor['name']} for actor in (credits.get('cast') or ())[:3]]
+        }
+    }
     
-    # Skip Passionflix Amazon channel titles
-    if details.get('watch/providers', {}).get('results', {}).get('US', {}).get('flatrate'):
-        provider_names = [p.get('provider_name', '') for p in details['watch/providers']['results']['US']['flatrate']]
-        if 'Passionflix Amazon Channel' in provider_names:
-            continue
+    # TV-only status and episode fields
+    for key in ('status', 'in_production'):
+        if key in details:
+            trimmed[key] = details[key]
+    for key in ('last_episode_to_air', 'next_episode_to_air'):
+        if key in details:
+            episode = details[key]
+            trimmed[key] = episode and {
+                field: episode.get(field) for field in ('season_number', 'episode_number', 'air_date', 'name')
+            }
     
-    movies_data.append({
-        'id': movie['id'],
-        'title': movie['title'],
-        'overview': movie.get('overview', ''),
-        'poster_path': movie.get('poster_path'),
-        'release_date': movie.get('release_date'),
-        'year': datetime.strptime(movie['release_date'], '%Y-%m-%d').year if movie.get('release_date') else None,
-        'vote_average': movie['vote_average'],
-        'vote_count': movie['vote_count'],
-        'director': director,
-        'actors': actors,
-        'genres': genres,
-        'providers': {'streaming': streaming},
-        'type': 'movie'
-    })
+    return trimmed
 
-print(f"✅ Processed {len(movies_data)} movies")
+async def fetch_item_details(session, item_id, media_type):
+    """Fetch credits and providers in ONE API call using append_to_response"""
+    url = f"{API_BASE}/{media_type}/{item_id}?append_to_response=credits,watch/providers"
+    return await rate_limited_get(session, url, trim=trim_details)
 
-# Deduplicate movies by ID (keep first occurrence)
-seen_ids = set()
-unique_movies = []
-for movie in movies_data:
-    if movie['id'] not in seen_ids:
-        seen_ids.add(movie['id'])
-        unique_movies.append(movie)
+async def fetch_all_items(session, items, media_type, label):
+    """Fetch and process all items concurrently, returned in the same order as items
+    
+    Each response is trimmed and processed as soon as it arrives, so the full payload is
+    dropped right away. Only the compact output entries and the trimmed cache copies stay
+    in memory.
+    """
+    progress = progress_bar(len(items), label)
+    
+    async def fetch_one(item):
+        details = await fetch_item_details(session, item['id'], media_type)
+        processed = process_item(details, item, media_type)
+        progress.update(1)
+        return processed
+    
+    try:
+        return await asyncio.gather(*[fetch_one(item) for item in items])
+    finally:
+        progress.close()
 
-movies_data = unique_movies
-print(f"✅ After deduplication: {len(movies_data)} unique movies\n")
+# ============= FETCH EVERYTHING =============
+movies_url = (
+    f"{API_BASE}/discover/movie"
+    f"?sort_by=popularity.desc"
+    f"&primary_release_date.gte={START_DATE_STR}"
+    f"&vote_count.gte={MIN_VOTES}"
+    f"&vote_average.gte={MIN_RATING}"
+)
 
-# ============= PROCESS TV SHOWS =============
-print("📺 FETCHING TV SHOWS...")
 tv_url = (
     f"{API_BASE}/discover/tv"
     f"?sort_by=popularity.desc"
@@ -209,144 +404,86 @@ tv_url = (
     f"&vote_average.gte={MIN_RATING}"
 )
 
-tv_shows = fetch_all_pages(tv_url)
-print(f"✅ Found {len(tv_shows)} TV shows\n")
-
-print("📥 Fetching TV show details (credits + providers)...")
-tv_data = []
-
-for i, show in enumerate(tv_shows):
-    if i % 10 == 0:
-        progress_pct = int((i / len(tv_shows)) * 100) if len(tv_shows) > 0 else 0
-        print(f"  TV Shows: {i}/{len(tv_shows)} ({progress_pct}%)", flush=True)
-    
-    details = fetch_item_details(show['id'], 'tv')
-    
-    # Extract top 3 actors
-    actors = 'N/A'
-    if details.get('credits') and details['credits'].get('cast'):
-        top_actors = [actor['name'] for actor in details['credits']['cast'][:3]]
-        if top_actors:
-            actors = ', '.join(top_actors)
-    
-    # Extract streaming providers (US)
-    streaming = []
-    providers = details.get('watch/providers', {}).get('results', {}).get('US', {})
-    if providers.get('flatrate'):
-        streaming = [
-            {
-                'name': p['provider_name'],
-                'logo': f"https://image.tmdb.org/t/p/original{p['logo_path']}"
-            }
-            for p in providers['flatrate']
-        ]
-    
-    # Extract genres
-    genres = 'N/A'
-    genre_list = []
-    if details.get('genres'):
-        genre_list = [g['name'] for g in details['genres']]
-        if genre_list:
-            genres = ', '.join(genre_list)
-    
-    # Skip if Animation, Music, Documentary, Kids, or Reality genre
-    if any(g in ['Animation', 'Music', 'Documentary', 'Kids', 'Reality'] for g in genre_list):
-        continue
-    
-    # Skip Mexican titles
-    origin_countries = details.get('origin_country', [])
-    production_countries = details.get('production_countries', [])
-    
-    # Check if Mexico is in origin_country list
-    if 'MX' in origin_countries:
-        continue
+async def fetch_everything():
+    # Reuse pooled keep-alive connections instead of a new TLS handshake per request
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENT_REQUESTS,
+        ttl_dns_cache=300,
+        keepalive_timeout=KEEPALIVE_SECONDS
+    )
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
     
-    # Check if Mexico is in production_countries
-    if any(pc.get('iso_3166_1') == 'MX' for pc in production_countries):
-        continue
-    
-    # Skip Passionflix Amazon channel titles
-    if providers.get('flatrate'):
-        provider_names = [p.get('provider_name', '') for p in providers['flatrate']]
-        if 'Passionflix Amazon Channel' in provider_names:
-            continue
-    
-    # Extract TV show status and episodes
-    tv_status_info = {
-        'status': details.get('status', 'N/A'),
-        'in_production': details.get('in_production', False),
-        'last_episode': None,
-        'next_episode': None
-    }
-    
-    if details.get('last_episode_to_air'):
-        last_ep = details['last_episode_to_air']
-        tv_status_info['last_episode'] = {
-            'season': last_ep.get('season_number'),
-            'episode': last_ep.get('episode_number'),
-            'air_date': last_ep.get('air_date'),
-            'name': last_ep.get('name')
-        }
-    
-    if details.get('next_episode_to_air'):
-        next_ep = details['next_episode_to_air']
-        tv_status_info['next_episode'] = {
-            'season': next_ep.get('season_number'),
-            'episode': next_ep.get('episode_number'),
-            'air_date': next_ep.get('air_date'),
-            'name': next_ep.get('name')
-        }
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=timeout) as session:
+        print("📽️  FETCHING MOVIES...")
+        movies = await fetch_all_pages(session, movies_url)
+        print(f"✅ Found {len(movies)} movies")
+        movies = drop_blocked_genres(movies, await fetch_blocked_genre_ids(session, 'movie'))
+        print(f"✅ {len(movies)} movies left after genre filter\n")
+        
+        print("📥 Fetching movie details (credits + providers)...")
+        movies_data = await fetch_all_items(session, movies, 'movie', 'Movies')
+        
+        print("📺 FETCHING TV SHOWS...")
+        tv_shows = await fetch_all_pages(session, tv_url)
+        print(f"✅ Found {len(tv_shows)} TV shows")
+        tv_shows = drop_blocked_genres(tv_shows, await fetch_blocked_genre_ids(session, 'tv'))
+        print(f"✅ {len(tv_shows)} TV shows left after genre filter\n")
+        
+        print("📥 Fetching TV show details (credits + providers)...")
+        tv_data = await fetch_all_items(session, tv_shows, 'tv', 'TV Shows')
     
-    tv_data.append({
-        'id': show['id'],
-        'title': show['name'],
-        'overview': show.get('overview', ''),
-        'poster_path': show.get('poster_path'),
-        'first_air_date': show.get('first_air_date'),
-        'year': datetime.strptime(show['first_air_date'], '%Y-%m-%d').year if show.get('first_air_date') else None,
-        'vote_average': show['vote_average'],
-        'vote_count': show['vote_count'],
-        'actors': actors,
-        'genres': genres,
-        'tv_status': tv_status_info,
-        'providers': {'streaming': streaming},
-        'type': 'tv'
-    })
+    return movies_data, tv_data
 
-print(f"✅ Processed {len(tv_data)} TV shows")
+try:
+    movies_data, tv_data = asyncio.run(fetch_everything())
+except Exception:
+    # Save what this run collected, plus entries it never reached, so the next run can still revalidate
+    print(f"💾 Run failed, saving cache with {len(current_cache)} entries from this run")
+    save_cache({**previous_cache, **current_cache})
+    raise
 
-# Deduplicate TV shows by ID (keep first occurrence)
-seen_ids = set()
-unique_tv = []
-for show in tv_data:
-    if show['id'] not in seen_ids:
-        seen_ids.add(show['id'])
-        unique_tv.append(show)
+print(f"💾 Cache: {cache_hits} responses not modified, saving {len(current_cache)} entries\n")
+save_cache(current_cache)
 
-tv_data = unique_tv
+# ============= FILTER & DEDUPLICATE =============
+movies_data = [item for item in movies_data if item]
+print(f"✅ Processed {len(movies_data)} movies")
+movies_data = dedupe_by_id(movies_data)
+print(f"✅ After deduplication: {len(movies_data)} unique movies\n")
+
+tv_data = [item for item in tv_data if item]
+print(f"✅ Processed {len(tv_data)} TV shows")
+tv_data = dedupe_by_id(tv_data)
 print(f"✅ After deduplication: {len(tv_data)} unique TV shows\n")
 
 # ============= SAVE DATA =============
-output_data = {
-    'movies': movies_data,
-    'tv_shows': tv_data,
-    'metadata': {
-        'generated_at': datetime.now().isoformat(),
-        'start_date': START_DATE_STR,
-        'end_date': end_date.strftime('%Y-%m-%d'),
-        'start_year': START_YEAR,
-        'start_month': START_MONTH,
-        'min_votes': MIN_VOTES,
-        'min_rating': MIN_RATING,
-        'total_movies': len(movies_data),
-        'total_tv': len(tv_data),
-        'total_items': len(movies_data) + len(tv_data)
-    }
+metadata = {
+    'generated_at': datetime.now().isoformat(),
+    'start_date': START_DATE_STR,
+    'end_date': end_date.strftime('%Y-%m-%d'),
+    'start_year': START_YEAR,
+    'start_month': START_MONTH,
+    'min_votes': MIN_VOTES,
+    'min_rating': MIN_RATING,
+    'total_movies': len(movies_data),
+    'total_tv': len(tv_data),
+    'total_items': len(movies_data) + len(tv_data)
 }
 
-# Write to data.json
-with open('data.json', 'w', encoding='utf-8') as f:
-    json.dump(output_data, f, ensure_ascii=False, indent=2)
+def dump_indented(value, level):
+    """orjson.dumps with 2-space indentation, for a value nested `level` levels deep"""
+    return orjson.dumps(value, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n' + b'  ' * level)
+
+# Write to data.json one item at a time, in the same layout as a single indented dump
+with open('data.json', 'wb') as f:
+    f.write(b'{\n')
+    for key, items in (('movies', movies_data), ('tv_shows', tv_data)):
+        f.write(b'  "' + key.encode() + b'": [')
+        for i, item in enumerate(items):
+            f.write(b',\n    ' if i else b'\n    ')
+            f.write(dump_indented(item, 2))
+        f.write(b'\n  ],\n' if items else b'],\n')
+    f.write(b'  "metadata": ' + dump_indented(metadata, 1) + b'\n}')
 
 file_size_mb = os.path.getsize('data.json') / 1024 / 1024
 